@@ -2,13 +2,19 @@
 # Detect a single class "yellow_x" on three AirSim cameras using Ultralytics YOLOv8.
 # pip install ultralytics opencv-python numpy airsim
 
-import os, re, socket, subprocess, shlex, time
-from collections import defaultdict
+import os, re, json, math, socket, subprocess, shlex, time
+from collections import defaultdict, namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing as mp
+import queue
 
 import cv2
 import numpy as np
 import airsim
 
+import framebus
+from framebus import FrameBus
+
 # ---------- CONFIG ----------
 WEIGHTS = "yellow_x_best.pt"   # <-- put your trained weights here
 CLASS_NAME = "yellow_x"        # single class in your model
@@ -18,11 +24,36 @@ CAM_NAME  = "down"
 IMG_W, IMG_H = 640, 360
 RPC_PORT = 41451
 
+TRANSPORT = "auto"         # "raw" (uncompressed BGR), "png" (compressed) or "auto" (probe both)
+DECODE_WORKERS = 3         # threads for PNG decode; cv2.imdecode releases the GIL
+PROBE_FRAMES = 5           # frames per mode when TRANSPORT == "auto"
+CAPTURE_DEPTH = False      # bundle DepthPlanar with Scene in the same simGetImages: range per box
+
 CONF_THRESH = 0.35
 IOU_THRESH  = 0.45
 PERSIST_FRAMES = 2         # require N consecutive frames to confirm
 PROCESS_EVERY_N = 1        # set 2–3 to cut CPU
+
+TILE_MODE = "auto"         # "off", "on", or "auto" = tile only when the marker looks small
+TILE_SIZE = 320            # tile edge in frame pixels, each tile is upscaled to TILE_IMGSZ
+TILE_OVERLAP = 0.25        # fraction shared by neighbouring tiles
+TILE_IMGSZ = 640
+TILE_SEAM_PX = 2           # box within this many px of an interior tile edge was cut by the seam
+MARKER_SIZE_M = 1.0        # physical edge length of the yellow_x marker
+CAM_HFOV_DEG = 90.0        # AirSim default camera FOV
+TILE_MIN_TARGET_PX = 24    # tile when the expected marker is smaller than this at model input
+DETECT_WORKERS = 0         # >0: capture, N detector processes and display share frames via framebus.py
+BUS_SLOTS = 16             # ring size; must exceed frames in flight (workers + vehicles)
+DISPLAY_WAIT_S = 0.02      # display process blocks this long for a result instead of spinning
+CLOSED_LOOP = False        # publish confirmed hits to target_hover.py, which flies the drone over them
+DETECTION_ADDR = ("127.0.0.1", 47800)
 SAVE_DIR = "yellowx_snaps"
+DEDUP_SNAPS = True         # skip snapshots whose marker crop looks like one saved recently
+DEDUP_HAMMING = 6          # max differing bits (of 64) for two crops to count as the same view
+DEDUP_LRU = 64             # recent hashes remembered per vehicle
+DEDUP_ACROSS_DRONES = False  # one shared index, so two drones over the same marker save once
+DEDUP_CROP_PAD = 0.5       # crop = union of boxes grown by this fraction of its size per side
+DEDUP_REPORT_S = 60.0      # seconds between [dedup] stats lines
 os.makedirs(SAVE_DIR, exist_ok=True)
 
 # ---------- AirSim helpers ----------
@@ -54,17 +85,122 @@ def quick_port_check(ip, port, timeout=1.5):
     except Exception:
         return False
 
-def get_image(client, vehicle_name, cam_name):
-    req = [airsim.ImageRequest(cam_name, airsim.ImageType.Scene, False, False)]
-    resp = client.simGetImages(req, vehicle_name=vehicle_name)
-    if not resp or resp[0].height == 0:
-        return None
-    img1d = np.frombuffer(resp[0].image_data_uint8, dtype=np.uint8)
-    bgr = img1d.reshape(resp[0].height, resp[0].width, 3)
+def capture_settings(width=IMG_W, height=IMG_H, depth=CAPTURE_DEPTH):
+    """settings.json block that makes AirSim render Scene (and DepthPlanar when we
+    request it) at our size, so no resize is needed."""
+    types = [airsim.ImageType.Scene] + ([airsim.ImageType.DepthPlanar] if depth else [])
+    return {"CameraDefaults": {"CaptureSettings": [
+        {"ImageType": int(t), "Width": width, "Height": height} for t in types]}}
+
+_resize_warned = set()     # image kinds we already printed the settings.json hint for
+
+def warn_resize(kind, w, h):
+    if kind not in _resize_warned:
+        _resize_warned.add(kind)
+        print(f"[warn] {kind} camera renders {w}x{h}, resizing to {IMG_W}x{IMG_H}. "
+              f"Add to AirSim settings.json: {json.dumps(capture_settings())}")
+
+def decode_frame(resp, compressed):
+    if compressed:
+        bgr = cv2.imdecode(np.frombuffer(resp.image_data_uint8, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if bgr is None:
+            return None
+    else:
+        img1d = np.frombuffer(resp.image_data_uint8, dtype=np.uint8)
+        bgr = img1d.reshape(resp.height, resp.width, 3)
     if (bgr.shape[1], bgr.shape[0]) != (IMG_W, IMG_H):
+        warn_resize("Scene", bgr.shape[1], bgr.shape[0])
         bgr = cv2.resize(bgr, (IMG_W, IMG_H), interpolation=cv2.INTER_AREA)
     return bgr
 
+def decode_depth(resp):
+    """Metric planar depth (m) as float32 HxW. The msgpack client hands us a Python
+    list, so this is the one unavoidable conversion; the reshape is a view."""
+    depth = np.asarray(resp.image_data_float, dtype=np.float32).reshape(resp.height, resp.width)
+    if (depth.shape[1], depth.shape[0]) != (IMG_W, IMG_H):
+        warn_resize("DepthPlanar", depth.shape[1], depth.shape[0])
+        depth = cv2.resize(depth, (IMG_W, IMG_H), interpolation=cv2.INTER_NEAREST)
+    return depth
+
+# camera pose and sim time that came back with the frame; depth is None unless requested
+FrameMeta = namedtuple("FrameMeta", "sim_ts position orientation depth")
+
+def frame_meta(resp, depth=None):
+    p, q = resp.camera_position, resp.camera_orientation
+    return FrameMeta(resp.time_stamp, (p.x_val, p.y_val, p.z_val),
+                     (q.w_val, q.x_val, q.y_val, q.z_val), depth)
+
+def _fetch(client, vehicle_name, cam_name, compressed, depth=False):
+    req = [airsim.ImageRequest(cam_name, airsim.ImageType.Scene, False, compressed)]
+    if depth:   # same RPC, same render tick
+        req.append(airsim.ImageRequest(cam_name, airsim.ImageType.DepthPlanar, True, False))
+    resp = client.simGetImages(req, vehicle_name=vehicle_name)
+    if not resp or resp[0].height == 0:
+        return None
+    return resp
+
+def get_image(client, vehicle_name, cam_name, compressed=False):
+    resp = _fetch(client, vehicle_name, cam_name, compressed)
+    return None if resp is None else decode_frame(resp[0], compressed)
+
+def get_images(client, vehicles, cam_name, compressed=False, pool=None, stamps=None,
+               meta=None, depth=False):
+    """Frames for all vehicles. RPCs stay sequential (the msgpack client is not
+    thread-safe) but each PNG decode runs in `pool` while the next RPC is in flight.
+    If given, `stamps` receives each vehicle's request time (capture timestamp) and
+    `meta` its FrameMeta; depth=True adds a DepthPlanar image to the same RPC."""
+    if stamps is None:
+        stamps = {}
+    out, futs = {}, {}
+    for v in vehicles:
+        stamps[v] = time.time()
+        resp = _fetch(client, v, cam_name, compressed, depth)
+        if resp is None:
+            out[v] = None
+            if meta is not None:
+                meta.pop(v, None)
+            continue
+        if meta is not None:
+            d = decode_depth(resp[1]) if depth and len(resp) > 1 and resp[1].height else None
+            meta[v] = frame_meta(resp[0], d)
+        if compressed and pool is not None:
+            futs[v] = pool.submit(decode_frame, resp[0], True)
+        else:
+            out[v] = decode_frame(resp[0], compressed)
+    for v, f in futs.items():
+        out[v] = f.result()
+    return out
+
+def measure_transport(client, vehicles, cam_name, compressed, frames=PROBE_FRAMES):
+    """Mean bytes, RPC time and decode time per frame for one transport mode."""
+    nbytes = rpc = dec = 0.0; n = 0
+    for _ in range(frames):
+        for v in vehicles:
+            t0 = time.perf_counter()
+            resp = _fetch(client, v, cam_name, compressed)
+            t1 = time.perf_counter()
+            if resp is None:
+                continue
+            decode_frame(resp[0], compressed)
+            t2 = time.perf_counter()
+            nbytes += len(resp[0].image_data_uint8); rpc += t1 - t0; dec += t2 - t1; n += 1
+    n = max(n, 1)
+    return {"bytes": nbytes / n, "rpc_s": rpc / n, "decode_s": dec / n}
+
+def choose_transport(client, vehicles, cam_name, workers=DECODE_WORKERS):
+    """Pick raw vs png from measured link bandwidth and decode cost. Returns True for png."""
+    raw = measure_transport(client, vehicles, cam_name, False)
+    png = measure_transport(client, vehicles, cam_name, True)
+    bw = raw["bytes"] / max(raw["rpc_s"], 1e-6)
+    # PNG decodes overlap with each other and with the next RPC across vehicles
+    par = max(1, min(workers, len(vehicles)))
+    cost_raw = raw["rpc_s"] + raw["decode_s"]
+    cost_png = png["rpc_s"] + png["decode_s"] / par
+    print(f"[transport] link ~{bw/1e6:.1f} MB/s | raw {raw['bytes']/1e3:.0f} kB "
+          f"{cost_raw*1e3:.1f} ms | png {png['bytes']/1e3:.0f} kB rpc {png['rpc_s']*1e3:.1f} ms "
+          f"+ decode {png['decode_s']*1e3:.1f} ms/{par} -> {'png' if cost_png < cost_raw else 'raw'}")
+    return cost_png < cost_raw
+
 # ---------- YOLO ----------
 class YellowXDetector:
     def __init__(self, weights):
@@ -74,11 +210,26 @@ class YellowXDetector:
         self.model = YOLO(weights)
         self.names = {int(k):v for k,v in self.model.names.items()}
 
-    def infer(self, bgr):
+    def infer(self, bgr, tiled=False):
         rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
-        res = self.model.predict(
-            source=rgb, imgsz=640, conf=CONF_THRESH, iou=IOU_THRESH, verbose=False
+        if not tiled:
+            res = self.model.predict(
+                source=rgb, imgsz=640, conf=CONF_THRESH, iou=IOU_THRESH, verbose=False
+            )
+            return self.collect(res)
+        origins, t = tile_origins(rgb.shape[1], rgb.shape[0])
+        crops = [rgb[y:y+t, x:x+t] for (x, y) in origins]
+        res = self.model.predict(   # one batch for all tiles
+            source=crops, imgsz=TILE_IMGSZ, conf=CONF_THRESH, iou=IOU_THRESH, verbose=False
         )
+        boxes, cut = [], []
+        for r, (ox, oy) in zip(res, origins):
+            tile_boxes = self.collect([r], ox, oy)
+            boxes += tile_boxes
+            cut += [seam_cut(b, ox, oy, t, rgb.shape[1], rgb.shape[0]) for b in tile_boxes]
+        return merge_boxes(boxes, cut)
+
+    def collect(self, res, ox=0, oy=0):
         boxes = []
         for r in res:
             if r.boxes is None: 
@@ -90,9 +241,201 @@ class YellowXDetector:
                 name = self.names.get(int(c), f"id{int(c)}")
                 if name != CLASS_NAME:
                     continue
-                boxes.append((int(x1), int(y1), int(x2-x1), int(y2-y1), float(cf)))
+                boxes.append((int(x1)+ox, int(y1)+oy, int(x2-x1), int(y2-y1), float(cf)))
         return boxes
 
+# ---------- Tiling ----------
+def tile_origins(w, h, tile=TILE_SIZE, overlap=TILE_OVERLAP):
+    """Top-left corners of overlapping square tiles covering a w x h frame."""
+    t = min(tile, w, h)
+    step = max(1, int(t * (1.0 - overlap)))
+    xs = list(range(0, w - t, step)) + [w - t]
+    ys = list(range(0, h - t, step)) + [h - t]
+    return [(x, y) for y in ys for x in xs], t
+
+def seam_cut(box, ox, oy, t, w, h, margin=TILE_SEAM_PX):
+    """True if box touches an edge of its tile (origin ox, oy, size t) that lies inside the
+    w x h frame, i.e. the marker may continue in the neighbouring tile."""
+    x, y, bw, bh = box[:4]
+    return ((ox > 0 and x - ox <= margin) or (oy > 0 and y - oy <= margin)
+            or (ox + t < w and x + bw >= ox + t - margin)
+            or (oy + t < h and y + bh >= oy + t - margin))
+
+def merge_boxes(boxes, cut=None, iou_thresh=IOU_THRESH, ios_thresh=0.6):
+    """Greedy NMS over (x,y,w,h,conf) from all tiles. cut[j] marks boxes clipped by an interior
+    tile edge (seam_cut). A box that mostly sits inside another (intersection-over-smaller) is
+    merged into the union with the best confidence only when one of the two was cut, so a
+    partial never replaces the full box; otherwise the best-scoring box is kept as is."""
+    if len(boxes) < 2:
+        return boxes
+    cut = np.zeros(len(boxes), bool) if cut is None else np.asarray(cut, bool)
+    b = np.array(boxes, dtype=np.float32)
+    x1, y1, x2, y2 = b[:,0], b[:,1], b[:,0] + b[:,2], b[:,1] + b[:,3]
+    area = np.maximum(b[:,2], 1) * np.maximum(b[:,3], 1)
+    order = np.argsort(-b[:,4])
+    out = []
+    while order.size:
+        i, rest = order[0], order[1:]
+        iw = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        ih = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = iw * ih
+        iou = inter / (area[i] + area[rest] - inter)
+        ios = inter / np.minimum(area[i], area[rest])
+        frag = rest[(ios > ios_thresh) & (cut[i] | cut[rest])]
+        if frag.size:
+            grp = np.concatenate(([i], frag))
+            ux1, uy1 = int(x1[grp].min()), int(y1[grp].min())
+            ux2, uy2 = int(x2[grp].max()), int(y2[grp].max())
+            out.append((ux1, uy1, ux2 - ux1, uy2 - uy1, boxes[i][4]))
+        else:
+            out.append(boxes[i])
+        order = rest[(iou <= iou_thresh) & (ios <= ios_thresh)]
+    return out
+
+def expected_target_px(alt_m, width=IMG_W, height=IMG_H, imgsz=640):
+    """Marker edge in model-input pixels for a nadir camera at alt_m above flat ground."""
+    if alt_m is None or alt_m <= 0:
+        return float("inf")
+    ground_w = 2.0 * alt_m * math.tan(math.radians(CAM_HFOV_DEG) / 2.0)
+    return MARKER_SIZE_M / ground_w * width * imgsz / max(width, height)
+
+def use_tiling(alt_m):
+    if TILE_MODE == "on":
+        return True
+    if TILE_MODE == "off":
+        return False
+    return expected_target_px(alt_m) < TILE_MIN_TARGET_PX
+
+def camera_altitude(position):
+    """Height above the world origin (m) from an NED camera position; assumes flat ground."""
+    return None if position is None or math.isnan(position[2]) else -position[2]
+
+def box_range(depth, box):
+    """Median planar depth (m) over the central half of a box, None if no valid pixels."""
+    x, y, w, h = box[:4]
+    x1, y1 = max(0, x + w//4), max(0, y + h//4)
+    x2, y2 = min(depth.shape[1], x + w - w//4), min(depth.shape[0], y + h - h//4)
+    patch = depth[y1:max(y2, y1+1), x1:max(x2, x1+1)]
+    valid = patch[np.isfinite(patch) & (patch > 0)]
+    return float(np.median(valid)) if valid.size else None
+
+# ---------- Closed loop ----------
+class DetectionPublisher:
+    """Confirmed hits as fire-and-forget UDP datagrams on localhost. Nothing blocks
+    and nothing queues up if target_hover.py is not listening."""
+    def __init__(self, addr=DETECTION_ADDR):
+        self.addr = addr
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+
+    def publish(self, v, boxes, stamps, ranges=None, pose=None):
+        """stamps: ordered stage -> time.time(), starting with "capture".
+        ranges: per-box metres (CAPTURE_DEPTH); pose: (sim_ts, position, orientation)."""
+        i = max(range(len(boxes)), key=lambda j: boxes[j][4])
+        x, y, w, h, cf = boxes[i]
+        stamps["publish"] = time.time()
+        msg = {"vehicle": v, "cx": x + w/2, "cy": y + h/2, "w": w, "h": h, "conf": cf,
+               "img_w": IMG_W, "img_h": IMG_H, "t": stamps}
+        if ranges:
+            msg["range_m"] = ranges[i]
+        if pose is not None:
+            msg["sim_ts"], msg["cam_pos"], msg["cam_q"] = pose
+        try:
+            self.sock.sendto(json.dumps(msg).encode(), self.addr)
+        except OSError:
+            pass        # ECONNREFUSED / EAGAIN: controller not up or not keeping up
+
+# ---------- Drawing ----------
+def no_image_tile(v):
+    canvas = np.zeros((IMG_H, IMG_W, 3), np.uint8)
+    cv2.putText(canvas, f"{v}: no image", (20, IMG_H//2),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,0,255), 2)
+    return canvas
+
+def draw_boxes(vis, boxes, ox=0, ranges=None):
+    for i, (x,y,w,h,cf) in enumerate(boxes):
+        x += ox
+        label = f"{CLASS_NAME}:{cf:.2f}"
+        if ranges and ranges[i] is not None:
+            label += f" {ranges[i]:.1f}m"
+        cv2.rectangle(vis, (x,y), (x+w,y+h), (0,255,255), 2)
+        cv2.putText(vis, label, (x, max(0,y-6)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,0,0), 3, cv2.LINE_AA)
+        cv2.putText(vis, label, (x, max(0,y-6)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,255), 1, cv2.LINE_AA)
+
+def draw_hud(vis, v, is_hit, persist, tiled=False, ox=0):
+    hud = f"{v}  Yellow-X:{'YES' if is_hit else 'no'} ({persist}/{PERSIST_FRAMES})"
+    if tiled:
+        hud += " [tiled]"
+    cv2.putText(vis, hud, (10+ox, 26), cv2.FONT_HERSHEY_SIMPLEX, 0.8,
+                (0,0,0), 3, cv2.LINE_AA)
+    cv2.putText(vis, hud, (10+ox, 26), cv2.FONT_HERSHEY_SIMPLEX, 0.8,
+                (0,255,0) if is_hit else (0,255,255), 2)
+
+def save_snapshot(v, vis, now):
+    path = os.path.join(SAVE_DIR, f"{v}_{int(now)}.jpg")
+    cv2.imwrite(path, vis)
+    print(f"[SAVE] {path}")
+    return path
+
+# ---------- Snapshot dedup ----------
+def marker_crop(bgr, boxes, pad=DEDUP_CROP_PAD):
+    xs = [b[0] for b in boxes] + [b[0] + b[2] for b in boxes]
+    ys = [b[1] for b in boxes] + [b[1] + b[3] for b in boxes]
+    x1, x2, y1, y2 = min(xs), max(xs), min(ys), max(ys)
+    px, py = int((x2 - x1) * pad), int((y2 - y1) * pad)
+    h, w = bgr.shape[:2]
+    return bgr[max(0, y1-py):min(h, y2+py), max(0, x1-px):min(w, x2+px)]
+
+def dhash(bgr):
+    """64-bit difference hash: sign of horizontal gradients on a 9x8 grey thumbnail."""
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+class SnapshotDeduper:
+    """Bounded LRU of recent crop hashes per vehicle (or one shared index).
+    A snapshot is new if no remembered hash is within DEDUP_HAMMING bits."""
+    def __init__(self, vehicles, max_hamming=DEDUP_HAMMING, lru=DEDUP_LRU,
+                 across_drones=DEDUP_ACROSS_DRONES):
+        self.max_hamming, self.across = max_hamming, across_drones
+        self.lru = lru * (len(vehicles) if across_drones else 1)
+        self.index = defaultdict(OrderedDict)
+        self.written = self.skipped = self.bytes_written = 0
+        self.last_report = time.time()
+
+    def is_new(self, v, bgr, boxes):
+        crop = marker_crop(bgr, boxes)
+        if crop.size == 0:
+            return True
+        h = dhash(crop)
+        idx = self.index["*" if self.across else v]
+        for k in idx:
+            if bin(k ^ h).count("1") <= self.max_hamming:
+                idx.move_to_end(k)
+                self.skipped += 1
+                return False
+        idx[h] = v
+        if len(idx) > self.lru:
+            idx.popitem(last=False)
+        return True
+
+    def wrote(self, path):
+        self.written += 1
+        self.bytes_written += os.path.getsize(path)
+
+    def maybe_report(self, now):
+        if now - self.last_report >= DEDUP_REPORT_S:
+            self.report()
+
+    def report(self):
+        self.last_report = time.time()
+        avg = self.bytes_written / max(self.written, 1)
+        print(f"[dedup] wrote {self.written} ({self.bytes_written/1e6:.1f} MB), "
+              f"skipped {self.skipped} (~{self.skipped*avg/1e6:.1f} MB avoided)")
+
 # ---------- Main ----------
 def main():
     host = resolve_airsim_host()
@@ -104,6 +447,9 @@ def main():
     client.confirmConnection()
     print("[airsim] RPC connected")
 
+    if DETECT_WORKERS > 0:
+        return main_multiproc(host)
+
     try:
         detector = YellowXDetector(WEIGHTS)
     except Exception as e:
@@ -111,61 +457,258 @@ def main():
         return
 
     persist = {v: 0 for v in VEHICLES}
-    last_save = {v: 0.0 for v in VEHICLES}
+    last_check = {v: 0.0 for v in VEHICLES}   # 1 s save window; a dedup skip closes it too
     frame_ctr = defaultdict(int)
 
+    if TRANSPORT == "auto":
+        compressed = choose_transport(client, VEHICLES, CAM_NAME)
+    else:
+        compressed = TRANSPORT == "png"
+    pool = ThreadPoolExecutor(DECODE_WORKERS) if compressed else None
+    publisher = DetectionPublisher() if CLOSED_LOOP else None
+    deduper = SnapshotDeduper(VEHICLES) if DEDUP_SNAPS else None
+    stamps, meta = {}, {}
+
     cv2.namedWindow("Yellow-X (D1|D2|D3)", cv2.WINDOW_NORMAL)
 
     while True:
         tiles = []
         now = time.time()
+        frames = get_images(client, VEHICLES, CAM_NAME, compressed, pool, stamps,
+                            meta, CAPTURE_DEPTH)
+        t_frame = time.time()
         for v in VEHICLES:
-            bgr = get_image(client, v, CAM_NAME)
+            bgr = frames[v]
             if bgr is None:
-                canvas = np.zeros((IMG_H, IMG_W, 3), np.uint8)
-                cv2.putText(canvas, f"{v}: no image", (20, IMG_H//2),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,0,255), 2)
-                tiles.append(canvas); continue
+                tiles.append(no_image_tile(v)); continue
 
             frame_ctr[v] += 1
             vis = bgr.copy()
             is_hit = False
             boxes = []
 
+            fm = meta[v]
+            tiled = use_tiling(camera_altitude(fm.position))
+
             if frame_ctr[v] % PROCESS_EVERY_N == 0:
-                boxes = detector.infer(bgr)
+                boxes = detector.infer(bgr, tiled=tiled)
                 if boxes:
                     persist[v] += 1
                 else:
                     persist[v] = 0
                 is_hit = persist[v] >= PERSIST_FRAMES
+                t_det = time.time()
+                ranges = [box_range(fm.depth, b) for b in boxes] if fm.depth is not None else None
+                if is_hit and publisher is not None:
+                    publisher.publish(v, boxes, {"capture": stamps[v], "frame": t_frame,
+                                                 "detect": t_det}, ranges,
+                                      (fm.sim_ts, fm.position, fm.orientation))
+
+                draw_boxes(vis, boxes, ranges=ranges)
 
-                for (x,y,w,h,cf) in boxes:
-                    cv2.rectangle(vis, (x,y), (x+w,y+h), (0,255,255), 2)
-                    cv2.putText(vis, f"{CLASS_NAME}:{cf:.2f}", (x, max(0,y-6)),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,0,0), 3, cv2.LINE_AA)
-                    cv2.putText(vis, f"{CLASS_NAME}:{cf:.2f}", (x, max(0,y-6)),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,255), 1, cv2.LINE_AA)
-
-                if is_hit and (now - last_save[v] > 1.0):
-                    path = os.path.join(SAVE_DIR, f"{v}_{int(now)}.jpg")
-                    cv2.imwrite(path, vis); last_save[v] = now
-                    print(f"[SAVE] {path}")
-
-            hud = f"{v}  Yellow-X:{'YES' if is_hit else 'no'} ({persist[v]}/{PERSIST_FRAMES})"
-            cv2.putText(vis, hud, (10, 26), cv2.FONT_HERSHEY_SIMPLEX, 0.8,
-                        (0,0,0), 3, cv2.LINE_AA)
-            cv2.putText(vis, hud, (10, 26), cv2.FONT_HERSHEY_SIMPLEX, 0.8,
-                        (0,255,0) if is_hit else (0,255,255), 2)
+                if is_hit and (now - last_check[v] > 1.0):
+                    last_check[v] = now
+                    if deduper is None or deduper.is_new(v, bgr, boxes):
+                        path = save_snapshot(v, vis, now)
+                        if deduper is not None:
+                            deduper.wrote(path)
+
+            draw_hud(vis, v, is_hit, persist[v], tiled)
             tiles.append(vis)
 
         grid = cv2.hconcat(tiles)
         cv2.imshow("Yellow-X (D1|D2|D3)", grid)
+        if deduper is not None:
+            deduper.maybe_report(now)
         key = cv2.waitKey(1) & 0xFF
         if key in (27, ord('q')):
             break
 
+    if pool is not None:
+        pool.shutdown()
+    if deduper is not None:
+        deduper.report()
     cv2.destroyAllWindows()
 
+# ---------- Multi-process (DETECT_WORKERS > 0) ----------
+def pin_to_core(core):
+    if hasattr(os, "sched_setaffinity"):   # Linux only; elsewhere the OS scheduler decides
+        allowed = sorted(os.sched_getaffinity(0))   # honours cpusets / taskset
+        os.sched_setaffinity(0, {allowed[core % len(allowed)]})
+
+def capture_proc(host, bus_name, depth_name, stop):
+    pin_to_core(0)
+    bus = FrameBus.attach(bus_name, BUS_SLOTS, (IMG_H, IMG_W, 3))
+    dbus = FrameBus.attach(depth_name, BUS_SLOTS, (IMG_H, IMG_W), np.float32) if depth_name else None
+    client = airsim.MultirotorClient(ip=host)
+    client.confirmConnection()
+    if TRANSPORT == "auto":
+        compressed = choose_transport(client, VEHICLES, CAM_NAME)
+    else:
+        compressed = TRANSPORT == "png"
+    pool = ThreadPoolExecutor(DECODE_WORKERS) if compressed else None
+    stamps, meta = {}, {}
+    while not stop.is_set():
+        frames = get_images(client, VEHICLES, CAM_NAME, compressed, pool, stamps,
+                            meta, dbus is not None)
+        for i, v in enumerate(VEHICLES):
+            if frames[v] is None:
+                continue
+            fm = meta[v]
+            pose = (fm.sim_ts,) + fm.position + fm.orientation
+            if dbus is not None:   # written first and in lockstep, so both rings share seqs
+                dbus.write(i, fm.depth if fm.depth is not None else np.nan, stamps[v], pose)
+            bus.write(i, frames[v], stamps[v], pose)
+    if pool is not None:
+        pool.shutdown()
+    bus.close()
+    if dbus is not None:
+        dbus.close()
+
+def detect_proc(k, n, bus_name, results, stop):
+    """Worker k of n handles seqs k, k+n, k+2n, ... and skips ahead when it falls behind."""
+    pin_to_core(k + 1)
+    # one core per worker: keep torch / OpenCV from spawning threads that fight over it
+    import torch
+    torch.set_num_threads(1)
+    cv2.setNumThreads(1)
+    bus = FrameBus.attach(bus_name, BUS_SLOTS, (IMG_H, IMG_W, 3))
+    try:
+        detector = YellowXDetector(WEIGHTS)
+    except Exception as e:
+        print(f"[fatal] worker {k} could not load YOLO weights:", e)
+        return
+    seq = k
+    while not stop.is_set():
+        head = bus.latest()
+        if head < seq:
+            time.sleep(0.001); continue
+        if head - seq >= BUS_SLOTS // 2:        # too far behind: newest seq of our stride
+            seq = head - ((head - k) % n)
+        got = bus.view(seq)
+        if got is not None:
+            frame, m = got
+            vi, ts = int(m[framebus.VEHICLE]), float(m[framebus.TS])
+            tiled = use_tiling(camera_altitude(m[framebus.PX:framebus.PZ+1]))
+            boxes = detector.infer(frame, tiled=tiled)
+            del frame, got
+            if bus.valid(seq):                  # slot not recycled while we read it
+                results.put((seq, vi, ts, tiled, boxes, k, time.time()))
+        seq += n
+    bus.close()
+
+def main_multiproc(host):
+    n = DETECT_WORKERS
+    shape = (IMG_H, IMG_W, 3)
+    bus = FrameBus.create(BUS_SLOTS, shape)
+    dbus = FrameBus.create(BUS_SLOTS, shape[:2], dtype=np.float32) if CAPTURE_DEPTH else None
+    stop = mp.Event()
+    results = mp.Queue()
+    procs = [mp.Process(target=capture_proc, args=(host, bus.name, dbus.name if dbus else None, stop),
+                        daemon=True)]
+    procs += [mp.Process(target=detect_proc, args=(k, n, bus.name, results, stop), daemon=True)
+              for k in range(n)]
+    for p in procs:
+        p.start()
+    print(f"[bus] {bus.name}: {BUS_SLOTS} slots, 1 capture + {n} detector processes")
+
+    persist = {v: 0 for v in VEHICLES}
+    last_check = {v: 0.0 for v in VEHICLES}   # 1 s save window; a dedup skip closes it too
+    last = {v: (-1, [], False, None) for v in VEHICLES}   # newest (seq, boxes, tiled, ranges)
+    det_count, det_t0 = [0] * n, time.time()
+    publisher = DetectionPublisher() if CLOSED_LOOP else None
+    deduper = SnapshotDeduper(VEHICLES) if DEDUP_SNAPS else None
+    shown = None                                       # (frame seqs, result seqs) on screen
+
+    cv2.namedWindow("Yellow-X (D1|D2|D3)", cv2.WINDOW_NORMAL)
+    try:
+        while True:
+            # sleep in the queue rather than redraw in a loop: this process isn't
+            # pinned and would otherwise take a core from the detector workers
+            pending = []
+            try:
+                pending.append(results.get(timeout=DISPLAY_WAIT_S))
+            except queue.Empty:
+                pass
+            now = time.time()
+            while True:                                # drain detector results
+                try:
+                    seq, vi, ts, tiled, boxes, k, t_det = pending.pop() if pending else results.get_nowait()
+                except queue.Empty:
+                    break
+                t_rx = time.time()
+                det_count[k] += 1
+                v = VEHICLES[vi]
+                if seq <= last[v][0]:                  # older than what we already have
+                    continue
+                ranges, pose = None, None
+                got = bus.view(seq)
+                if got is not None and not math.isnan(got[1][framebus.SIM_TS]):
+                    m = got[1]; del got
+                    pose = (int(m[framebus.SIM_TS]), tuple(m[framebus.PX:framebus.PZ+1]),
+                            tuple(m[framebus.QW:framebus.QZ+1]))
+                if dbus is not None and boxes:
+                    got = dbus.view(seq)
+                    if got is not None:
+                        ranges = [box_range(got[0], b) for b in boxes]
+                        del got
+                        if not dbus.valid(seq):
+                            ranges = None
+                last[v] = (seq, boxes, tiled, ranges)
+                persist[v] = persist[v] + 1 if boxes else 0
+                if persist[v] >= PERSIST_FRAMES and publisher is not None:
+                    publisher.publish(v, boxes, {"capture": ts, "detect": t_det, "result": t_rx},
+                                      ranges, pose)
+                if persist[v] >= PERSIST_FRAMES and (now - last_check[v] > 1.0):
+                    got = bus.view(seq)
+                    if got is not None:
+                        vis = got[0].copy()
+                        del got
+                        if bus.valid(seq):
+                            last_check[v] = now
+                            if deduper is None or deduper.is_new(v, vis, boxes):
+                                draw_boxes(vis, boxes, ranges=ranges)
+                                path = save_snapshot(v, vis, now)
+                                if deduper is not None:
+                                    deduper.wrote(path)
+
+            newest = bus.latest_per_vehicle()
+            state = (newest, [last[v][0] for v in VEHICLES])
+            if state != shown:                         # redraw only on a new frame or result
+                shown = state
+                tiles = []
+                for i, v in enumerate(VEHICLES):
+                    got = bus.view(newest[i]) if i in newest else None
+                    tiles.append(got[0] if got is not None else no_image_tile(v))
+                grid = cv2.hconcat(tiles)              # the only copy on the display path
+                del tiles, got
+                for i, v in enumerate(VEHICLES):
+                    seq, boxes, tiled, ranges = last[v]
+                    draw_boxes(grid, boxes, ox=i*IMG_W, ranges=ranges)
+                    draw_hud(grid, v, persist[v] >= PERSIST_FRAMES, persist[v], tiled, ox=i*IMG_W)
+                cv2.imshow("Yellow-X (D1|D2|D3)", grid)
+
+            if now - det_t0 >= 5.0:
+                rates = [c / (now - det_t0) for c in det_count]
+                print(f"[bus] detections/s {sum(rates):.1f} "
+                      f"(per worker {' '.join(f'{r:.1f}' for r in rates)})")
+                det_count, det_t0 = [0] * n, now
+            if deduper is not None:
+                deduper.maybe_report(now)
+
+            key = cv2.waitKey(1) & 0xFF
+            if key in (27, ord('q')):
+                break
+    finally:
+        stop.set()
+        for p in procs:
+            p.join(timeout=3)
+        if deduper is not None:
+            deduper.report()
+        cv2.destroyAllWindows()
+        bus.close()
+        if dbus is not None:
+            dbus.close()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,184 @@
+# bench_hotpaths.py
+# Offline micro-benchmarks for the per-frame / per-setpoint hot paths, on fixed
+# synthetic inputs (no AirSim, PX4, GPU or YOLO weights needed - just the pip packages).
+# Each result is the median over --repeat timed passes, interleaved across benchmarks
+# so a burst of background load costs each one a pass rather than its whole run.
+# A fixed reference workload runs in the same rounds; ratios are divided by its
+# slowdown, so a throttled or busy machine doesn't read as a code regression.
+# Compares against bench_baseline.json and exits 1 if anything got slower than
+# baseline * threshold.
+#
+#   python bench_hotpaths.py                 # compare with the stored baseline
+#   python bench_hotpaths.py --update        # re-record the baseline on this machine
+#   python bench_hotpaths.py -k draw grid    # only benchmarks whose name contains a word
+
+import argparse, json, os, platform, statistics, sys, timeit
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+import app
+from control_math import follower_targets, keyboard_velocity
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+THRESHOLD = 1.5            # fail when median time > baseline * THRESHOLD (per-bench override in JSON)
+REPEAT = 9                 # timed passes per benchmark; the median is reported
+TARGET_S = 0.1             # calls per pass are scaled so one pass takes about this long
+BATCH = 1000               # calls per timed invocation for the sub-microsecond benchmarks
+
+# ---------- synthetic inputs ----------
+rng = np.random.default_rng(0)
+FRAME = rng.integers(0, 256, (app.IMG_H, app.IMG_W, 3), dtype=np.uint8)
+FRAME_2X = rng.integers(0, 256, (app.IMG_H*2, app.IMG_W*2, 3), dtype=np.uint8)
+DEPTH = rng.uniform(20.0, 40.0, (app.IMG_H, app.IMG_W)).astype(np.float32)
+
+def raw_response(img):
+    return SimpleNamespace(image_data_uint8=img.tobytes(), height=img.shape[0], width=img.shape[1])
+
+RESP_NATIVE = raw_response(FRAME)
+RESP_2X = raw_response(FRAME_2X)
+RESP_PNG = SimpleNamespace(image_data_uint8=cv2.imencode(".png", cv2.GaussianBlur(FRAME, (0, 0), 3))[1].tobytes())
+
+class _Tensor:
+    """What r.boxes.xyxy / .cls / .conf look like to YellowXDetector.collect."""
+    def __init__(self, a):
+        self.a = a
+    def cpu(self):
+        return self
+    def numpy(self):
+        return self.a
+
+def yolo_result(n):
+    xy = rng.uniform(0, app.IMG_W - 40, (n, 2)).astype(np.float32)
+    wh = rng.uniform(8, 40, (n, 2)).astype(np.float32)
+    boxes = SimpleNamespace(xyxy=_Tensor(np.hstack([xy, xy + wh])),
+                            cls=_Tensor(rng.integers(0, 2, n).astype(np.float32)),
+                            conf=_Tensor(rng.uniform(0.35, 1.0, n).astype(np.float32)))
+    return [SimpleNamespace(boxes=boxes)]
+
+DETECTOR = app.YellowXDetector.__new__(app.YellowXDetector)   # no model: collect() only
+DETECTOR.names = {0: app.CLASS_NAME, 1: "other"}
+RESULT_50 = yolo_result(50)
+BOXES_3 = [(100, 80, 30, 30, 0.91), (300, 200, 24, 26, 0.77), (500, 50, 40, 36, 0.52)]
+TILE_BOXES = [(x + dx, y + dy, 30, 30, c) for (x, y, _, _, c) in BOXES_3 * 6
+              for dx, dy in ((0, 0), (2, 1), (-1, 3))][:30]
+TILE_CUT = [i % 3 == 2 for i in range(len(TILE_BOXES))]   # every third box clipped by a seam
+TILES = [FRAME.copy() for _ in app.VEHICLES]
+
+app._resize_warned.update(("Scene", "DepthPlanar"))  # keep the one-time resize hints out of the output
+
+def batched(fn, n=BATCH):
+    """Run fn n times per timed call, so timer and lambda overhead don't dominate tiny benchmarks."""
+    def run():
+        for _ in range(n):
+            fn()
+    run.calls = n
+    return run
+
+def draw_tile():
+    vis = FRAME.copy()
+    app.draw_boxes(vis, BOXES_3)
+    app.draw_hud(vis, app.VEHICLES[0], True, 2, True)
+    return vis
+
+BENCHMARKS = {
+    "get_image.decode_raw_native": batched(lambda: app.decode_frame(RESP_NATIVE, False), 100),
+    "get_image.decode_raw_resize": lambda: app.decode_frame(RESP_2X, False),
+    "get_image.decode_png":        lambda: app.decode_frame(RESP_PNG, True),
+    "infer.collect_50_boxes":      lambda: DETECTOR.collect(RESULT_50),
+    "infer.merge_tiled_boxes":     lambda: app.merge_boxes(TILE_BOXES, TILE_CUT),
+    "main.draw_overlay":           draw_tile,
+    "main.hconcat_grid":           lambda: cv2.hconcat(TILES),
+    "main.dedup_hash":             lambda: app.dhash(app.marker_crop(FRAME, BOXES_3[:1])),
+    "main.box_range":              lambda: app.box_range(DEPTH, BOXES_3[0]),
+    "swarm_follow.follower_targets": batched(lambda: follower_targets(12.3, -4.5, -10.0, 5, 4)),
+    "keyboard.velocity":           batched(lambda: keyboard_velocity(True, False, False, True, False, True, 2.0, 1.0)),
+}
+
+def reference():
+    """Repo-independent mix of interpreter and OpenCV work; tracks how fast the machine is right now."""
+    acc = 0
+    for i in range(2000):
+        acc += i * i
+    cv2.GaussianBlur(FRAME, (5, 5), 0)
+    return acc
+
+def calibrate(fn):
+    """(timer, number of invocations per pass, calls per pass) for a ~TARGET_S pass."""
+    fn()                                              # warm caches / lazy inits
+    t = timeit.Timer(fn)
+    number, _ = t.autorange()
+    number = max(1, int(number * TARGET_S / 0.2))     # autorange aims at >= 0.2 s
+    return t, number, number * getattr(fn, "calls", 1)
+
+def measure(names, repeat=REPEAT):
+    """{name: median seconds per call}, taking one pass of every benchmark per round."""
+    runs = {name: calibrate(BENCHMARKS.get(name, reference)) for name in names}
+    passes = {name: [] for name in names}
+    for _ in range(repeat):
+        for name, (t, number, calls) in runs.items():
+            passes[name].append(t.timeit(number) / calls)
+    return {name: statistics.median(xs) for name, xs in passes.items()}
+
+def fmt(s):
+    for unit, k in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if s >= k:
+            return f"{s / k:8.2f} {unit}"
+    return f"{s / 1e-9:8.1f} ns"
+
+def main():
+    ap = argparse.ArgumentParser(description="Hot-path micro-benchmarks with regression gate")
+    ap.add_argument("--update", action="store_true", help="write results as the new baseline")
+    ap.add_argument("--threshold", type=float, default=None, help=f"default {THRESHOLD}")
+    ap.add_argument("--repeat", type=int, default=REPEAT)
+    ap.add_argument("-k", nargs="+", default=None, help="run benchmarks whose name contains any of these")
+    args = ap.parse_args()
+
+    base = {"threshold": THRESHOLD, "benchmarks": {}}
+    if os.path.exists(BASELINE):
+        with open(BASELINE) as f:
+            base = json.load(f)
+    threshold = args.threshold or base.get("threshold", THRESHOLD)
+
+    names = [n for n in BENCHMARKS if not args.k or any(k in n for k in args.k)]
+    results = measure(names + ["reference"], args.repeat)
+    ref_sec = results.pop("reference")
+    speed = ref_sec / base["reference"] if "reference" in base else 1.0
+    failed = []
+    print(f"[bench] machine slowdown vs baseline {speed:.2f}x (reference workload); ratios below are divided by it")
+    print(f"{'benchmark':<32}{'time':>12}{'baseline':>12}{'ratio':>8}")
+    for name, sec in results.items():
+        ref = base["benchmarks"].get(name)
+        if ref is None:
+            print(f"{name:<32}{fmt(sec):>12}{'new':>12}")
+            continue
+        ratio = sec / ref["seconds"] / speed
+        limit = args.threshold or ref.get("threshold", threshold)
+        flag = ""
+        if ratio > limit:
+            failed.append(name); flag = f"  FAIL (> {limit:.2f}x)"
+        print(f"{name:<32}{fmt(sec):>12}{fmt(ref['seconds']):>12}{ratio:>7.2f}x{flag}")
+
+    if args.update:
+        for name, sec in results.items():
+            entry = base["benchmarks"].setdefault(name, {})
+            entry["seconds"] = sec
+        base["reference"] = ref_sec
+        base["threshold"] = threshold
+        base["machine"] = f"{platform.machine()} {platform.processor() or platform.system()}, " \
+                          f"python {platform.python_version()}, numpy {np.__version__}, cv2 {cv2.__version__}"
+        with open(BASELINE, "w") as f:
+            json.dump(base, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"[bench] baseline written to {BASELINE}")
+        return 0
+
+    if failed:
+        print(f"[bench] {len(failed)} regression(s): {', '.join(failed)}")
+        return 1
+    print("[bench] no regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+# bench_telemetry.py
+# Stress the gui.py / test2.py control loops against fake_mavsdk and report
+# event-loop lag and telemetry-to-command latency: the age of the newest sample
+# when each setpoint reached the vehicle and, with --rtt-ms, how long each awaited
+# set_velocity_body took to complete. No PX4, AirSim or Tk needed.
+#
+#   python bench_telemetry.py --scenario gui    --vehicles 1 --rate 100 --ui-cost-ms 2
+#   python bench_telemetry.py --scenario follow --vehicles 3 --rate 50 --jitter 0.5 --burst 5
+
+import argparse, asyncio, time
+
+from fake_mavsdk import VelocityBodyYawspeed, make_swarm
+
+# same numbers as gui.py / test2.py
+MOVEMENT_SPEED = 2.0
+FOLLOW_OFFSET = 5
+SIDE_OFFSET = 4
+
+def pct(xs, p):
+    if not xs:
+        return float("nan")
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100.0 * (len(xs) - 1))))]
+
+def report(name, xs_s):
+    ms = [x * 1000.0 for x in xs_s]
+    print(f"  {name:<28} n={len(ms):<6} p50={pct(ms, 50):7.2f}  p90={pct(ms, 90):7.2f}  "
+          f"p99={pct(ms, 99):7.2f}  max={max(ms, default=float('nan')):7.2f} ms")
+
+def busy(ms):
+    """Stand-in for synchronous Tk widget updates done inside a telemetry callback."""
+    end = time.perf_counter() + ms / 1000.0
+    while time.perf_counter() < end:
+        pass
+
+async def set_velocity(drone, vel, args, stats):
+    """Awaited setpoint as gui.py / test2.py send it, timed when a round-trip is simulated."""
+    t0 = time.monotonic()
+    await drone.offboard.set_velocity_body(vel)
+    if args.rtt_ms:
+        stats["set_velocity_body await"].append(time.monotonic() - t0)
+
+async def loop_lag(samples, interval=0.01):
+    while True:
+        t0 = time.monotonic()
+        await asyncio.sleep(interval)
+        samples.append(time.monotonic() - t0 - interval)
+
+async def sample_ages(drone, stream, ages, ui_cost_ms):
+    # mirrors print_health / print_position in gui.py
+    async for _ in getattr(drone.telemetry, stream)():
+        ages.append(time.monotonic() - drone.last_emit)
+        busy(ui_cost_ms)
+
+async def gui_scenario(drones, args, stats):
+    """gui.py: health + position consumers updating widgets, plus the 10 Hz keyboard loop."""
+    for d in drones:
+        await d.action.arm(); await d.action.takeoff()
+        await d.offboard.set_velocity_body(VelocityBodyYawspeed(0.0, 0.0, 0.0, 0.0))
+        await d.offboard.start()
+        for stream in ("health", "position"):
+            asyncio.ensure_future(sample_ages(d, stream, stats["sample age"], args.ui_cost_ms))
+
+    async def keyboard_control_loop(d):
+        last = None
+        while True:
+            await set_velocity(d, VelocityBodyYawspeed(MOVEMENT_SPEED, 0.0, 0.0, 0.0), args, stats)
+            now = time.monotonic()
+            if last is not None:
+                stats["setpoint period"].append(now - last)
+            last = now
+            await asyncio.sleep(0.1)
+
+    for d in drones:
+        asyncio.ensure_future(keyboard_control_loop(d))
+
+async def follow_scenario(drones, args, stats):
+    """test2.py: leader position_velocity_ned drives follower setpoints sample-by-sample."""
+    leader, followers = drones[0], drones[1:]
+    for f in followers:
+        f.telem_source = leader           # follower setpoints are computed from leader samples
+    for d in drones:
+        await d.action.arm(); await d.action.takeoff()
+        await d.offboard.set_velocity_body(VelocityBodyYawspeed(0.0, 0.0, 0.0, 0.0))
+        await d.offboard.start()
+    await leader.offboard.set_velocity_body(VelocityBodyYawspeed(3.0, 0.0, 0.0, 0.0))
+
+    async def follow():
+        async for pv in leader.telemetry.position_velocity_ned():
+            t_rx = time.monotonic()
+            t_emit = leader.last_emit
+            stats["sample age"].append(t_rx - t_emit)
+            x, y = pv.position.north_m, pv.position.east_m
+            for i, f in enumerate(followers):
+                side = SIDE_OFFSET if i % 2 == 0 else -SIDE_OFFSET
+                s = f.state
+                vn, ve = (x - FOLLOW_OFFSET - s.n), (y + side - s.e)
+                await set_velocity(f, VelocityBodyYawspeed(vn, ve, 0.0, 0.0), args, stats)
+            stats["telemetry -> command"].append(time.monotonic() - t_emit)
+            busy(args.ui_cost_ms)
+            if args.follow_sleep:
+                await asyncio.sleep(args.follow_sleep)   # test2.py sleeps 1 s per sample
+
+    asyncio.ensure_future(follow())
+
+async def run(args):
+    drones = make_swarm(args.vehicles, rate_hz=args.rate, jitter=args.jitter, burst=args.burst,
+                        queue_size=args.queue, rtt_s=args.rtt_ms / 1000.0)
+    if args.scenario == "follow" and len(drones) < 2:
+        raise SystemExit("follow scenario needs --vehicles >= 2")
+    stats = {"event-loop lag": [], "sample age": [], "setpoint period": [], "telemetry -> command": [],
+             "set_velocity_body await": []}
+    lag = asyncio.ensure_future(loop_lag(stats["event-loop lag"]))
+    scenario = gui_scenario if args.scenario == "gui" else follow_scenario
+    await scenario(drones, args, stats)
+    await asyncio.sleep(args.duration)
+    lag.cancel()
+    # recorded by fake_mavsdk on arrival: newest sample the vehicle had handed out at that moment
+    stats["telemetry age at setpoint"] = [a for d in drones for a in d.command_ages("set_velocity_body")]
+
+    print(f"[bench] scenario={args.scenario} vehicles={args.vehicles} rate={args.rate}Hz "
+          f"jitter={args.jitter} burst={args.burst} ui_cost={args.ui_cost_ms}ms "
+          f"duration={args.duration}s")
+    for name, xs in stats.items():
+        if xs:
+            report(name, xs)
+    emitted = sum(d.emitted for d in drones)
+    dropped = sum(d.dropped for d in drones)
+    print(f"  telemetry samples emitted={emitted} dropped={dropped} "
+          f"commands={sum(len(d.commands) for d in drones)}")
+    for task in asyncio.all_tasks():
+        if task is not asyncio.current_task():
+            task.cancel()
+
+def main():
+    ap = argparse.ArgumentParser(description="Telemetry stress benchmark on fake_mavsdk")
+    ap.add_argument("--scenario", choices=("gui", "follow"), default="gui")
+    ap.add_argument("--vehicles", type=int, default=1)
+    ap.add_argument("--rate", type=float, default=10.0, help="telemetry Hz per stream")
+    ap.add_argument("--jitter", type=float, default=0.0, help="+/- fraction of the period")
+    ap.add_argument("--burst", type=int, default=1, help="samples per tick")
+    ap.add_argument("--queue", type=int, default=0, help="per-stream buffer, 0 = unbounded")
+    ap.add_argument("--rtt-ms", type=float, default=0.0, help="simulated command round-trip")
+    ap.add_argument("--ui-cost-ms", type=float, default=0.0,
+                    help="synchronous work per telemetry sample (Tk updates)")
+    ap.add_argument("--follow-sleep", type=float, default=0.0,
+                    help="sleep per leader sample in the follow loop (test2.py uses 1.0)")
+    ap.add_argument("--duration", type=float, default=5.0)
+    asyncio.run(run(ap.parse_args()))
+
+if __name__ == "__main__":
+    main()
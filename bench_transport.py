@@ -0,0 +1,45 @@
+# bench_transport.py
+# Bytes per frame and capture FPS for each get_images() transport mode.
+# Needs a running AirSim (same host discovery as app.py).
+#
+#   python bench_transport.py --frames 100 --workers 1 3
+
+import argparse, time
+from concurrent.futures import ThreadPoolExecutor
+
+import airsim
+
+from app import (CAM_NAME, RPC_PORT, VEHICLES, get_images, measure_transport,
+                 quick_port_check, resolve_airsim_host)
+
+def main():
+    ap = argparse.ArgumentParser(description="AirSim image transport benchmark")
+    ap.add_argument("--frames", type=int, default=50, help="capture rounds per mode (all vehicles)")
+    ap.add_argument("--workers", type=int, nargs="+", default=[3], help="PNG decode pool sizes")
+    ap.add_argument("--vehicles", nargs="+", default=VEHICLES)
+    args = ap.parse_args()
+
+    host = resolve_airsim_host()
+    if not quick_port_check(host, RPC_PORT):
+        print(f"[error] cannot reach AirSim RPC at {host}:{RPC_PORT}")
+        return
+    client = airsim.MultirotorClient(ip=host)
+    client.confirmConnection()
+
+    modes = [("raw", False, 0)] + [(f"png/{w}", True, w) for w in args.workers]
+    print(f"{'mode':<10}{'kB/frame':>10}{'rpc ms':>9}{'decode ms':>11}{'frames/s':>10}{'rounds/s':>10}")
+    for name, compressed, workers in modes:
+        m = measure_transport(client, args.vehicles, CAM_NAME, compressed, frames=5)
+        pool = ThreadPoolExecutor(workers) if workers else None
+        get_images(client, args.vehicles, CAM_NAME, compressed, pool)   # warm-up
+        t0 = time.perf_counter()
+        for _ in range(args.frames):
+            get_images(client, args.vehicles, CAM_NAME, compressed, pool)
+        dt = time.perf_counter() - t0
+        if pool is not None:
+            pool.shutdown()
+        print(f"{name:<10}{m['bytes']/1e3:>10.1f}{m['rpc_s']*1e3:>9.1f}{m['decode_s']*1e3:>11.1f}"
+              f"{args.frames*len(args.vehicles)/dt:>10.1f}{args.frames/dt:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# control_math.py
+# Pure setpoint math shared by gui.py and test2.py. No MAVSDK, AirSim or Tk
+# imports, so it can be benchmarked offline (bench_hotpaths.py).
+
+def keyboard_velocity(move_forward, move_backward, move_left, move_right, move_up, move_down,
+                      movement_speed, altitude_speed):
+    """Body-frame (forward, right, down, yaw_rate) from the held movement keys."""
+    forward_vel = 0.0
+    right_vel = 0.0
+    down_vel = 0.0
+    yaw_rate = 0.0
+
+    if move_forward:
+        forward_vel = movement_speed
+    elif move_backward:
+        forward_vel = -movement_speed
+
+    if move_right:
+        right_vel = movement_speed
+    elif move_left:
+        right_vel = -movement_speed
+
+    if move_up:
+        down_vel = -altitude_speed
+    elif move_down:
+        down_vel = altitude_speed
+
+    return forward_vel, right_vel, down_vel, yaw_rate
+
+def follower_targets(x, y, z, follow_offset, side_offset):
+    """NED targets for the two followers: behind the leader, one either side."""
+    return ((x - follow_offset, y + side_offset, z),
+            (x - follow_offset, y - side_offset, z))
@@ -0,0 +1,249 @@
+# fake_mavsdk.py
+# Drop-in stand-in for mavsdk.System that needs no PX4 SITL and no mavsdk_server.
+# Emits telemetry streams at configurable rate / jitter / burst size and records
+# every action and offboard command it receives, so gui.py, test1.py and the
+# follow loop can be stress-tested on any machine.
+#
+#   from fake_mavsdk import System          # instead of: from mavsdk import System
+#   drones = make_swarm(3, rate_hz=50)      # several independent vehicles
+#
+# Set MAVSDK_FAKE=1 to make gui.py / test1.py pick this up automatically
+# (MAVSDK_FAKE_RATE / _JITTER / _BURST tune the streams there).
+
+import asyncio, math, os, random, time
+from collections import namedtuple
+
+try:  # reuse the real types when mavsdk is installed so isinstance/except still match
+    from mavsdk.offboard import OffboardError, VelocityBodyYawspeed
+    from mavsdk.action import ActionError
+except ImportError:
+    class OffboardError(Exception):
+        def __init__(self, result, origin):
+            super().__init__(f"{result.result}: '{result.result_str}'; origin: {origin}")
+            self._result, self._origin = result, origin
+
+    class ActionError(Exception):
+        def __init__(self, result, origin):
+            super().__init__(f"{result.result}: '{result.result_str}'; origin: {origin}")
+            self._result, self._origin = result, origin
+
+    VelocityBodyYawspeed = namedtuple(
+        "VelocityBodyYawspeed", "forward_m_s right_m_s down_m_s yawspeed_deg_s")
+
+# ---------- CONFIG (defaults, override per System or via env) ----------
+TELEM_RATE_HZ = float(os.getenv("MAVSDK_FAKE_RATE", "10"))    # telemetry rate per stream
+TELEM_JITTER  = float(os.getenv("MAVSDK_FAKE_JITTER", "0"))   # +/- fraction of the period, 0.3 = +/-30 %
+TELEM_BURST   = int(os.getenv("MAVSDK_FAKE_BURST", "1"))      # samples delivered back-to-back per tick
+TELEM_QUEUE   = 0          # per-stream buffer, 0 = unbounded; oldest sample dropped when full
+HOME_LAT, HOME_LON, HOME_ALT = 47.397742, 8.545594, 488.0
+CLIMB_RATE = 2.0           # m/s used for takeoff / land
+
+# ---------- Telemetry types (same field names as mavsdk) ----------
+ConnectionState = namedtuple("ConnectionState", "uuid is_connected")
+Health = namedtuple("Health", "is_gyrometer_calibration_ok is_accelerometer_calibration_ok "
+                              "is_magnetometer_calibration_ok is_local_position_ok "
+                              "is_global_position_ok is_home_position_ok is_armable")
+Position = namedtuple("Position", "latitude_deg longitude_deg absolute_altitude_m relative_altitude_m")
+PositionNed = namedtuple("PositionNed", "north_m east_m down_m")
+VelocityNed = namedtuple("VelocityNed", "north_m_s east_m_s down_m_s")
+PositionVelocityNed = namedtuple("PositionVelocityNed", "position velocity")
+
+Command = namedtuple("Command", "t plugin name args telem_age")
+_Result = namedtuple("_Result", "result result_str")   # shape of mavsdk's *Result objects
+
+class _VehicleState:
+    """Very small kinematic model: NED position integrated from the active setpoint."""
+    def __init__(self, north=0.0, east=0.0):
+        self.n, self.e, self.d = north, east, 0.0
+        self.vn = self.ve = self.vd = 0.0
+        self.yaw = 0.0
+        self.armed = False
+        self.in_air = False
+        self.offboard = False
+        self.takeoff_alt = 2.5
+        self.target_d = None          # climb / descend target (down, m)
+        self._t = time.monotonic()
+
+    def step(self):
+        now = time.monotonic()
+        dt, self._t = now - self._t, now
+        if self.target_d is not None:
+            err = self.target_d - self.d
+            self.vn = self.ve = 0.0
+            self.vd = max(-CLIMB_RATE, min(CLIMB_RATE, err / max(dt, 1e-3)))
+            if abs(err) < 0.05:
+                self.d, self.vd, self.target_d = self.target_d, 0.0, None
+                if self.d >= 0.0:
+                    self.in_air = False
+        self.n += self.vn * dt
+        self.e += self.ve * dt
+        self.d = min(0.0, self.d + self.vd * dt)
+
+class _Plugin:
+    def __init__(self, system):
+        self._sys = system
+
+    def _record(self, name, *args):
+        now, last = time.monotonic(), self._sys.telem_source.last_emit
+        age = None if last is None else now - last   # last delivered sample -> this command
+        self._sys.commands.append(Command(now, type(self).__name__, name, args, age))
+
+class Core(_Plugin):
+    async def connection_state(self):
+        await asyncio.sleep(self._sys.connect_delay)
+        while True:
+            yield ConnectionState(self._sys.uuid, True)
+            await self._sys._tick()
+
+class Telemetry(_Plugin):
+    async def _stream(self, make):
+        # Samples are produced on the vehicle's clock whether or not anyone keeps up,
+        # like mavsdk_server pushing over gRPC; a slow consumer sees them queue up.
+        sys = self._sys
+        q = asyncio.Queue(sys.queue_size)
+
+        async def produce():
+            while True:
+                sys.state.step()
+                for _ in range(sys.burst):
+                    if q.full():
+                        q.get_nowait(); sys.dropped += 1
+                    q.put_nowait((time.monotonic(), make()))
+                    sys.emitted += 1
+                await sys._tick()
+
+        task = asyncio.ensure_future(produce())
+        try:
+            while True:
+                t, sample = await q.get()
+                sys.last_emit = t
+                yield sample
+        finally:
+            task.cancel()
+
+    def health(self):
+        return self._stream(lambda: Health(True, True, True, True, True, True, not self._sys.state.armed))
+
+    def position(self):
+        def make():
+            s = self._sys.state
+            lat = HOME_LAT + math.degrees(s.n / 6378137.0)
+            lon = HOME_LON + math.degrees(s.e / (6378137.0 * math.cos(math.radians(HOME_LAT))))
+            return Position(lat, lon, HOME_ALT - s.d, -s.d)
+        return self._stream(make)
+
+    def position_velocity_ned(self):
+        def make():
+            s = self._sys.state
+            return PositionVelocityNed(PositionNed(s.n, s.e, s.d), VelocityNed(s.vn, s.ve, s.vd))
+        return self._stream(make)
+
+    def in_air(self):
+        return self._stream(lambda: self._sys.state.in_air)
+
+    def armed(self):
+        return self._stream(lambda: self._sys.state.armed)
+
+class Action(_Plugin):
+    async def arm(self):
+        self._record("arm"); await self._sys._rtt()
+        self._sys.state.armed = True
+
+    async def disarm(self):
+        self._record("disarm"); await self._sys._rtt()
+        if self._sys.state.in_air:
+            raise ActionError(_Result("COMMAND_DENIED", "Vehicle is in air"), "disarm()")
+        self._sys.state.armed = False
+
+    async def shutdown(self):
+        self._record("shutdown"); await self._sys._rtt()
+        self._sys.state.armed = False
+
+    async def set_takeoff_altitude(self, altitude):
+        self._record("set_takeoff_altitude", altitude); await self._sys._rtt()
+        self._sys.state.takeoff_alt = float(altitude)
+
+    async def takeoff(self):
+        self._record("takeoff"); await self._sys._rtt()
+        s = self._sys.state
+        if not s.armed:
+            raise ActionError(_Result("COMMAND_DENIED", "Vehicle not armed"), "takeoff()")
+        s.in_air, s.target_d = True, -s.takeoff_alt
+
+    async def land(self):
+        self._record("land"); await self._sys._rtt()
+        s = self._sys.state
+        s.offboard, s.target_d = False, 0.0
+
+class Offboard(_Plugin):
+    async def set_velocity_body(self, velocity_body_yawspeed):
+        self._record("set_velocity_body", velocity_body_yawspeed); await self._sys._rtt()
+        self._sys.last_setpoint = velocity_body_yawspeed
+        s = self._sys.state
+        if s.offboard:
+            v = velocity_body_yawspeed
+            c, sn = math.cos(math.radians(s.yaw)), math.sin(math.radians(s.yaw))
+            s.vn = v.forward_m_s * c - v.right_m_s * sn
+            s.ve = v.forward_m_s * sn + v.right_m_s * c
+            s.vd = v.down_m_s
+            s.yaw = (s.yaw + v.yawspeed_deg_s * 0.1) % 360.0
+
+    async def start(self):
+        self._record("start"); await self._sys._rtt()
+        if self._sys.last_setpoint is None:
+            raise OffboardError(_Result("NO_SETPOINT_SET", "No setpoint set"), "start()")
+        self._sys.state.offboard = True
+
+    async def stop(self):
+        self._record("stop"); await self._sys._rtt()
+        s = self._sys.state
+        s.offboard, s.vn, s.ve, s.vd = False, 0.0, 0.0, 0.0
+
+    async def is_active(self):
+        return self._sys.state.offboard
+
+class System:
+    """Fake mavsdk.System. Same plugin attributes (core, telemetry, action, offboard)."""
+    _count = 0
+
+    def __init__(self, mavsdk_server_address=None, port=50051, *, rate_hz=TELEM_RATE_HZ,
+                 jitter=TELEM_JITTER, burst=TELEM_BURST, queue_size=TELEM_QUEUE,
+                 rtt_s=0.0, connect_delay=0.0,
+                 north=0.0, east=0.0, seed=None):
+        System._count += 1
+        self.uuid = System._count
+        self.rate_hz, self.jitter, self.burst = float(rate_hz), float(jitter), max(1, int(burst))
+        self.queue_size = int(queue_size)
+        self.rtt_s = float(rtt_s)            # simulated command round-trip
+        self.connect_delay = float(connect_delay)
+        self.system_address = None
+        self.state = _VehicleState(north, east)
+        self.commands = []                   # list[Command] in receive order
+        self.last_setpoint = None
+        self.last_emit = None                # emit time of the last sample handed to a consumer
+        self.telem_source = self             # vehicle whose telemetry drives our commands (follow: leader)
+        self.emitted = self.dropped = 0
+        self._rng = random.Random(seed)
+        self.core, self.telemetry = Core(self), Telemetry(self)
+        self.action, self.offboard = Action(self), Offboard(self)
+
+    async def connect(self, system_address=None):
+        self.system_address = system_address
+
+    async def _tick(self):
+        period = 1.0 / self.rate_hz
+        if self.jitter:
+            period *= 1.0 + self._rng.uniform(-self.jitter, self.jitter)
+        await asyncio.sleep(max(0.0, period))
+
+    async def _rtt(self):
+        await asyncio.sleep(self.rtt_s)
+
+    def command_ages(self, name=None):
+        """Age (s) of the newest telemetry sample at the moment each command arrived."""
+        return [c.telem_age for c in self.commands
+                if c.telem_age is not None and (name is None or c.name == name)]
+
+def make_swarm(n, spacing=5.0, **kw):
+    """n fake vehicles spaced along the east axis, each with its own streams."""
+    return [System(east=i * spacing, seed=i, **kw) for i in range(n)]
@@ -0,0 +1,97 @@
+# framebus.py
+# Shared-memory ring of fixed-size frame slots for one writer and many readers
+# in other processes. Frames are written once and read as NumPy views straight
+# out of shared memory - no pickling, no copy on the read side.
+#
+# Layout of the single SharedMemory block:
+#   head  int64               seq of the newest complete frame (-1 = none yet)
+#   meta  float64[slots, 11]  seq, vehicle index, capture time, then the camera pose
+#                             that came with the frame: sim time (ns), NED x y z, quat w x y z
+#   data  dtype[slots, *shape]  uint8 HxWx3 for BGR, float32 HxW for depth
+#
+# Each slot is a seqlock: the writer marks it -1 while copying, then publishes
+# the seq. A reader checks valid(seq) after using a view; False means the slot
+# was recycled mid-read and the result must be dropped.
+
+import numpy as np
+from multiprocessing import shared_memory
+
+_META_COLS = 11
+SEQ, VEHICLE, TS, SIM_TS, PX, PY, PZ, QW, QX, QY, QZ = range(_META_COLS)
+_POSE_COLS = _META_COLS - SIM_TS
+
+class FrameBus:
+    def __init__(self, shm, slots, shape, owner, dtype=np.uint8):
+        self.shm, self.slots, self.shape, self.owner = shm, slots, tuple(shape), owner
+        off = 0
+        self.head = np.ndarray((1,), np.int64, shm.buf, off); off += 8
+        self.meta = np.ndarray((slots, _META_COLS), np.float64, shm.buf, off)
+        off += self.meta.nbytes
+        self.data = np.ndarray((slots,) + self.shape, dtype, shm.buf, off)
+
+    @staticmethod
+    def nbytes(slots, shape, dtype=np.uint8):
+        return 8 + slots * _META_COLS * 8 + slots * int(np.prod(shape)) * np.dtype(dtype).itemsize
+
+    @classmethod
+    def create(cls, slots, shape, name=None, dtype=np.uint8):
+        shm = shared_memory.SharedMemory(name=name, create=True,
+                                         size=cls.nbytes(slots, shape, dtype))
+        bus = cls(shm, slots, shape, owner=True, dtype=dtype)
+        bus.head[0] = -1
+        bus.meta[:, SEQ] = -1
+        return bus
+
+    @classmethod
+    def attach(cls, name, slots, shape, dtype=np.uint8):
+        return cls(shared_memory.SharedMemory(name=name), slots, shape, owner=False, dtype=dtype)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    # ---------- writer ----------
+    def write(self, vehicle, frame, ts, pose=None):
+        """pose: (sim_ts, x, y, z, qw, qx, qy, qz) or None (stored as NaN)."""
+        seq = int(self.head[0]) + 1
+        m = self.meta[seq % self.slots]
+        m[SEQ] = -1                      # slot is being rewritten
+        self.data[seq % self.slots] = frame
+        m[VEHICLE], m[TS] = vehicle, ts
+        m[SIM_TS:] = pose if pose is not None else (np.nan,) * _POSE_COLS
+        m[SEQ] = seq
+        self.head[0] = seq
+        return seq
+
+    # ---------- readers ----------
+    def latest(self):
+        return int(self.head[0])
+
+    def view(self, seq):
+        """(frame view, copy of the meta row) for seq, or None if not written / already recycled."""
+        i = seq % self.slots
+        m = self.meta[i].copy()
+        if seq < 0 or m[SEQ] != seq:
+            return None
+        return self.data[i], m
+
+    def valid(self, seq):
+        return self.meta[seq % self.slots, SEQ] == seq
+
+    def latest_per_vehicle(self):
+        """{vehicle index: newest complete seq} over the slots still in the ring."""
+        out = {}
+        for seq, v in self.meta[:, :VEHICLE + 1]:
+            if seq >= 0 and seq > out.get(int(v), -1):
+                out[int(v)] = int(seq)
+        return out
+
+    def close(self):
+        # drop our views before closing, or SharedMemory.close() raises BufferError
+        del self.head, self.meta, self.data
+        try:
+            self.shm.close()
+        except BufferError:
+            pass        # a caller still holds a frame view; the mapping goes away with the process
+        if self.owner:
+            self.shm.unlink()
@@ -2,11 +2,16 @@ import asyncio
 from tkinter import *
 from turtle import home
 from async_tkinter_loop import async_handler, async_mainloop
-from mavsdk import *
-from mavsdk import System
-from mavsdk.offboard import (OffboardError, VelocityBodyYawspeed)
+import os
+if os.getenv("MAVSDK_FAKE"):   # synthetic telemetry, see fake_mavsdk.py
+    from fake_mavsdk import (System, OffboardError, VelocityBodyYawspeed)
+else:
+    from mavsdk import *
+    from mavsdk import System
+    from mavsdk.offboard import (OffboardError, VelocityBodyYawspeed)
 import time
 import webbrowser
+from control_math import keyboard_velocity
 
 drone = System()
 lastPacketTime=time.time()-10
@@ -108,25 +113,9 @@ async def keyboard_control_loop():
     while keyboard_control_active:
         try:
             # Calculate velocity based on movement state
-            forward_vel = 0.0
-            right_vel = 0.0
-            down_vel = 0.0
-            yaw_rate = 0.0
-            
-            if move_forward:
-                forward_vel = movement_speed
-            elif move_backward:
-                forward_vel = -movement_speed
-                
-            if move_right:
-                right_vel = movement_speed
-            elif move_left:
-                right_vel = -movement_speed
-                
-            if move_up:
-                down_vel = -altitude_speed
-            elif move_down:
-                down_vel = altitude_speed
+            forward_vel, right_vel, down_vel, yaw_rate = keyboard_velocity(
+                move_forward, move_backward, move_left, move_right, move_up, move_down,
+                movement_speed, altitude_speed)
             
             # Send velocity command
             await drone.offboard.set_velocity_body(
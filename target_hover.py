@@ -0,0 +1,241 @@
+# target_hover.py
+# Closed-loop consumer for app.py (set CLOSED_LOOP = True there). Receives confirmed
+# yellow_x detections over localhost UDP, flies the detecting drone over the marker
+# with body-frame velocity setpoints and reports capture-to-actuation latency per stage.
+#
+#   python target_hover.py                   # AirSim API control, host found like app.py
+#   python target_hover.py --backend mavsdk  # PX4 offboard (MAVSDK_FAKE=1 for fake_mavsdk)
+
+import argparse, asyncio, json, math, os, time
+from collections import defaultdict
+
+from app import DETECTION_ADDR, RPC_PORT, VEHICLES, quick_port_check, resolve_airsim_host
+
+# ---------- CONFIG ----------
+GAIN = 1.5                 # m/s per unit of normalised image error (-1..1)
+MAX_SPEED = 2.0            # m/s
+CENTER_TOL = 0.05          # normalised error treated as centred -> hover
+MAX_AGE_S = 0.5            # detections older than this (capture -> receive) are not acted on
+HOLD_TIMEOUT_S = 1.0       # no fresh detection for this long -> stop and hand control back
+SETPOINT_DT = 0.1          # watchdog period; PX4 offboard needs setpoints at >= 2 Hz
+CAM_TOP_IS_FORWARD = True  # "down" camera mounted with image top towards the nose
+MAVSDK_ADDRS = {"Drone_1": "udp://:14540", "Drone_2": "udp://:14541", "Drone_3": "udp://:14542"}
+
+HIST_BINS_MS = [5, 10, 20, 50, 100, 200, 500, 1000]
+
+def body_velocity(cx, cy, img_w, img_h):
+    """(forward, right) m/s that moves a nadir camera towards the pixel (cx, cy)."""
+    ex = (cx / img_w - 0.5) * 2.0
+    ey = (cy / img_h - 0.5) * 2.0
+    if math.hypot(ex, ey) < CENTER_TOL:
+        return 0.0, 0.0
+    fwd, right = -GAIN * ey, GAIN * ex
+    if not CAM_TOP_IS_FORWARD:
+        fwd, right = -fwd, -right
+    n = math.hypot(fwd, right)
+    if n > MAX_SPEED:
+        fwd, right = fwd * MAX_SPEED / n, right * MAX_SPEED / n
+    return fwd, right
+
+# ---------- Latency accounting ----------
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100.0 * (len(xs) - 1))))]
+
+class LatencyStats:
+    """Per-stage deltas between consecutive stamps plus capture -> command total."""
+    def __init__(self):
+        self.stages = defaultdict(list)   # "a->b" -> ms, in first-seen order
+        self.total = []                   # capture -> command, ms
+        self.stale = 0
+
+    def add(self, stamps):
+        keys = list(stamps)
+        for a, b in zip(keys, keys[1:]):
+            self.stages[f"{a}->{b}"].append((stamps[b] - stamps[a]) * 1000.0)
+        self.total.append((stamps["command"] - stamps["capture"]) * 1000.0)
+
+    def report(self):
+        if not self.total:
+            print(f"[latency] no detections yet, stale={self.stale}"); return
+        print(f"[latency] ms{'':<22}{'n':>6}{'p50':>8}{'p90':>8}{'p99':>8}{'max':>8}   stale={self.stale}")
+        for name, xs in list(self.stages.items()) + [("capture->command", self.total)]:
+            print(f"  {name:<26}{len(xs):>6}{pct(xs, 50):>8.1f}{pct(xs, 90):>8.1f}"
+                  f"{pct(xs, 99):>8.1f}{max(xs):>8.1f}")
+        counts = [0] * (len(HIST_BINS_MS) + 1)
+        for x in self.total:
+            counts[sum(x > b for b in HIST_BINS_MS)] += 1
+        edges = [0] + HIST_BINS_MS
+        print("  capture->command histogram:")
+        for i, c in enumerate(counts):
+            hi = f"{HIST_BINS_MS[i]:>5}" if i < len(HIST_BINS_MS) else "  inf"
+            bar = "#" * round(40 * c / max(counts))
+            print(f"    {edges[i]:>5}-{hi} ms {c:>6} {bar}")
+
+# ---------- Backends ----------
+class AirSimBackend:
+    def __init__(self, host):
+        import airsim
+        self.client = airsim.MultirotorClient(ip=host)
+        self.client.confirmConnection()
+        self.had_control = {}     # vehicle -> API control was already on (test2.py, manualcontrol.py)
+
+    async def start(self, vehicles):
+        pass
+
+    async def acquire(self, v):
+        self.had_control[v] = self.client.isApiControlEnabled(vehicle_name=v)
+        if not self.had_control[v]:
+            self.client.enableApiControl(True, vehicle_name=v)
+
+    async def release(self, v):
+        self.client.moveByVelocityBodyFrameAsync(0.0, 0.0, 0.0, SETPOINT_DT, vehicle_name=v)
+        if not self.had_control.pop(v, False):   # only undo what we turned on
+            self.client.enableApiControl(False, vehicle_name=v)
+
+    async def command(self, v, fwd, right):
+        # not joined: the RPC returns once AirSim has accepted the setpoint;
+        # duration makes the drone stop on its own if we go quiet
+        self.client.moveByVelocityBodyFrameAsync(fwd, right, 0.0, HOLD_TIMEOUT_S, vehicle_name=v)
+
+class MavsdkBackend:
+    def __init__(self):
+        if os.getenv("MAVSDK_FAKE"):
+            from fake_mavsdk import System, VelocityBodyYawspeed
+        else:
+            from mavsdk import System
+            from mavsdk.offboard import VelocityBodyYawspeed
+        self.System, self.Vel = System, VelocityBodyYawspeed
+        self.drones = {}
+        self.was_active = {}      # vehicle -> offboard was already running (gui.py keyboard mode)
+
+    async def start(self, vehicles):
+        # connect only; offboard is started per vehicle on its first detection
+        for i, v in enumerate(vehicles):
+            drone = self.System(port=50051 + i)
+            await drone.connect(system_address=MAVSDK_ADDRS[v])
+            async for state in drone.core.connection_state():
+                if state.is_connected:
+                    break
+            self.drones[v] = drone
+
+    async def acquire(self, v):
+        offboard = self.drones[v].offboard
+        self.was_active[v] = await offboard.is_active()
+        if not self.was_active[v]:
+            await offboard.set_velocity_body(self.Vel(0.0, 0.0, 0.0, 0.0))
+            await offboard.start()
+
+    async def release(self, v):
+        offboard = self.drones[v].offboard
+        await offboard.set_velocity_body(self.Vel(0.0, 0.0, 0.0, 0.0))
+        if not self.was_active.pop(v, False):    # only stop offboard if we started it
+            await offboard.stop()
+
+    async def command(self, v, fwd, right):
+        await self.drones[v].offboard.set_velocity_body(self.Vel(fwd, right, 0.0, 0.0))
+
+# ---------- Controller ----------
+class HoverController(asyncio.DatagramProtocol):
+    def __init__(self, backend, vehicles, stats):
+        self.backend, self.vehicles, self.stats = backend, set(vehicles), stats
+        self.last_capture = defaultdict(float)   # newest capture stamp acted on, per vehicle
+        self.last_cmd = {}                      # vehicle -> (time, fwd, right), controlled ones only
+        self.active = set()                     # vehicles we currently hold control of
+        self.locks = defaultdict(asyncio.Lock)  # serialises acquire / release per vehicle
+
+    def datagram_received(self, data, addr):
+        t_rx = time.time()
+        msg = json.loads(data)
+        stamps = msg["t"]; stamps["receive"] = t_rx
+        v = msg["vehicle"]
+        if v not in self.vehicles or stamps["capture"] <= self.last_capture[v]:
+            return                                   # unknown drone or out of order
+        if t_rx - stamps["capture"] > MAX_AGE_S:
+            self.stats.stale += 1
+            return
+        self.last_capture[v] = stamps["capture"]
+        fwd, right = body_velocity(msg["cx"], msg["cy"], msg["img_w"], msg["img_h"])
+        asyncio.ensure_future(self._command(v, fwd, right, stamps))
+
+    async def _command(self, v, fwd, right, stamps):
+        # the whole acquire -> command -> last_cmd sequence holds the lock, so a
+        # watchdog release can't slip in between and leave a setpoint after stop()
+        async with self.locks[v]:
+            if v not in self.active:             # first fresh detection: take this drone only
+                await self.backend.acquire(v)
+                self.active.add(v)
+                print(f"-- {v} under hover control")
+            await self.backend.command(v, fwd, right)
+            stamps["command"] = time.time()
+            self.last_cmd[v] = (stamps["command"], fwd, right)
+        self.stats.add(stamps)
+
+    async def _resend(self, v, t):
+        """Repeat the setpoint sent at t, unless v was released or got a newer one meanwhile."""
+        async with self.locks[v]:
+            cmd = self.last_cmd.get(v)
+            if v in self.active and cmd is not None and cmd[0] == t:
+                await self.backend.command(v, cmd[1], cmd[2])
+
+    async def release(self, v, t=None):
+        """Hand v back; with t, only if no command newer than t arrived meanwhile."""
+        async with self.locks[v]:
+            if v in self.active and (t is None or self.last_cmd.get(v, (t,))[0] == t):
+                self.active.discard(v)
+                self.last_cmd.pop(v, None)
+                await self.backend.release(v)
+                print(f"-- {v} released")
+
+    async def watchdog(self):
+        """For controlled drones only: repeat the last setpoint between detections and
+        hand control back once no fresh detection arrived for HOLD_TIMEOUT_S."""
+        while True:
+            now = time.time()
+            for v, (t, fwd, right) in list(self.last_cmd.items()):
+                if now - t > HOLD_TIMEOUT_S:
+                    await self.release(v, t)
+                elif now - t > SETPOINT_DT:
+                    await self._resend(v, t)
+            await asyncio.sleep(SETPOINT_DT)
+
+async def run(args):
+    if args.backend == "airsim":
+        host = resolve_airsim_host()
+        if not quick_port_check(host, RPC_PORT):
+            print("[error] cannot reach AirSim RPC. Start Unreal/AirSim and allow firewall.")
+            return
+        backend = AirSimBackend(host)
+    else:
+        backend = MavsdkBackend()
+    await backend.start(args.vehicles)
+
+    stats = LatencyStats()
+    ctl = HoverController(backend, args.vehicles, stats)
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(lambda: ctl, local_addr=DETECTION_ADDR)
+    print(f"[hover] listening on {DETECTION_ADDR[0]}:{DETECTION_ADDR[1]} for {', '.join(args.vehicles)}")
+    wd = asyncio.ensure_future(ctl.watchdog())
+    try:
+        while True:
+            await asyncio.sleep(args.report_every)
+            stats.report()
+    finally:
+        wd.cancel()
+        transport.close()
+        for v in list(ctl.active):
+            await ctl.release(v)
+        stats.report()
+
+def main():
+    ap = argparse.ArgumentParser(description="Hover over confirmed yellow_x detections")
+    ap.add_argument("--backend", choices=("airsim", "mavsdk"), default="airsim")
+    ap.add_argument("--vehicles", nargs="+", default=VEHICLES)
+    ap.add_argument("--report-every", type=float, default=10.0, help="seconds between latency reports")
+    try:
+        asyncio.run(run(ap.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
-import asyncio
-from mavsdk import System
+import asyncio, os
+if os.getenv("MAVSDK_FAKE"):   # synthetic telemetry, see fake_mavsdk.py
+    from fake_mavsdk import System
+else:
+    from mavsdk import System
 
 async def run():
     drone = System()
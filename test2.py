@@ -1,5 +1,6 @@
 import asyncio, time, airsim
 from mavsdk import System
+from control_math import follower_targets
 
 # ------- CONFIG -------------------------------------------------------------
 AIRSIM_HOST = ""   # Windows host-side address, put your own 
@@ -47,12 +48,9 @@ async def swarm_follow():
                        pv.position.east_m,
                        pv.position.down_m)
 
-            client.moveToPositionAsync(x - FOLLOW_OFFSET,
-                                       y + SIDE_OFFSET,  z, 3,
-                                       vehicle_name="Drone2")
-            client.moveToPositionAsync(x - FOLLOW_OFFSET,
-                                       y - SIDE_OFFSET,  z, 3,
-                                       vehicle_name="Drone3")
+            d2, d3 = follower_targets(x, y, z, FOLLOW_OFFSET, SIDE_OFFSET)
+            client.moveToPositionAsync(*d2, 3, vehicle_name="Drone2")
+            client.moveToPositionAsync(*d3, 3, vehicle_name="Drone3")
             await asyncio.sleep(1)
 
     except KeyboardInterrupt: